@@ -11,6 +11,10 @@ from typing import Optional, Tuple
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 import requests
+from geocoding_scheduler import QuotaScheduler, geocode_with_quota, prioritize_rows
+from map_snapshot import publish_snapshot
+from geocoding_recorder import (DEFAULT_LOG_FILE, GeocodingRecorder, RecordingGeocoder, RecordingScheduler,
+                                RecordingSheetsUpdater, ReplayGeocoder, ReplayScheduler, ReplaySheetsUpdater)
 
 class AddressNormalizer:
     def __init__(self):
@@ -37,32 +41,61 @@ class AddressNormalizer:
             (r'^\s+|\s+$', ''),
         ]
     
-    def normalize_address(self, address: str) -> str:
+    def normalize_with_rules(self, address: str) -> Tuple[str, list]:
         """
-        주소를 정규화합니다.
+        주소를 정규화하고, 실제로 주소를 변경한 규칙 목록을 함께 반환합니다.
         
         Args:
             address (str): 원본 주소
             
         Returns:
-            str: 정규화된 주소
+            Tuple[str, list]: (정규화된 주소, 주소를 변경한 규칙의 패턴 문자열 목록)
         """
         if not address:
-            return address
+            return address, []
             
         normalized = address.strip()
+        applied = []
         
         # 정규화 규칙 적용
         for pattern, replacement in self.normalization_rules:
             if callable(replacement):
-                normalized = re.sub(pattern, lambda m: str(replacement(m)), normalized)
+                result = re.sub(pattern, lambda m: str(replacement(m)), normalized)
             else:
-                normalized = re.sub(pattern, replacement, normalized)
+                result = re.sub(pattern, replacement, normalized)
+            # 공백 정리 규칙은 비용 분석에 의미가 없으므로 제외
+            if result != normalized and pattern not in (r'\s+', r'^\s+|\s+$'):
+                applied.append(pattern)
+            normalized = result
         
         # 최종 정리
         normalized = re.sub(r'\s+', ' ', normalized).strip()
         
-        return normalized
+        return normalized, applied
+    
+    def normalize_address(self, address: str) -> str:
+        """
+        주소를 정규화합니다.
+        
+        Args:
+            address (str): 원본 주소
+            
+        Returns:
+            str: 정규화된 주소
+        """
+        return self.normalize_with_rules(address)[0]
+    
+    def get_applied_rules(self, address: str) -> list:
+        """
+        주소를 실제로 변경한 정규화 규칙 목록을 반환합니다.
+        
+        Args:
+            address (str): 원본 주소
+            
+        Returns:
+            list: 주소를 변경한 규칙의 패턴 문자열 목록
+        """
+        return self.normalize_with_rules(address)[1]
     
     def should_normalize(self, address: str) -> bool:
         """
@@ -105,6 +138,8 @@ class KakaoGeocoder:
         self.headers = {
             "Authorization": f"KakaoAK {api_key}"
         }
+        self.last_status_code = None
+        self.last_error = None
     
     def geocode_address(self, address: str) -> Optional[Tuple[float, float]]:
         """
@@ -116,6 +151,8 @@ class KakaoGeocoder:
         Returns:
             Optional[Tuple[float, float]]: (위도, 경도) 또는 None
         """
+        self.last_status_code = None
+        self.last_error = None
         try:
             params = {
                 "query": address
@@ -127,6 +164,7 @@ class KakaoGeocoder:
                 params=params,
                 timeout=10
             )
+            self.last_status_code = response.status_code
             
             if response.status_code == 200:
                 data = response.json()
@@ -142,6 +180,10 @@ class KakaoGeocoder:
                     return None
             else:
                 print(f"API 요청 실패: {response.status_code}")
+                try:
+                    self.last_error = response.json()
+                except ValueError:
+                    self.last_error = None
                 return None
                 
         except Exception as e:
@@ -242,6 +284,10 @@ def main():
     GOOGLE_CREDENTIALS_FILE = "google-service-account-key.json"
     SPREADSHEET_ID = "YOUR_SPREADSHEET_ID"  # 구글 시트 ID를 입력하세요 (URL에서 확인)
     SHEET_NAME = "Sheet1"  # 시트 이름을 입력하세요
+    GEOCODING_LOG_MODE = None  # 요청 기록: 'record', 기록으로 재실행(네트워크 없음): 'replay'
+    GEOCODING_LOG_FILE = DEFAULT_LOG_FILE
+    GEOCODING_REPLAY_RUN = None  # 재생할 실행 id (None이면 이 스크립트의 가장 최근 실행)
+    SNAPSHOT_OUTPUT_DIR = "public/data"  # 지도 스냅샷 출력 위치 (앱 빌드 전에 생성되어야 배포에 포함됨)
     
     # 설정값 검증
     if KAKAO_API_KEY == "YOUR_KAKAO_REST_API_KEY":
@@ -258,12 +304,25 @@ def main():
     
     # 초기화
     normalizer = AddressNormalizer()
-    geocoder = KakaoGeocoder(KAKAO_API_KEY)
-    sheets_updater = GoogleSheetsUpdater(GOOGLE_CREDENTIALS_FILE)
+    if GEOCODING_LOG_MODE == 'replay':
+        # 기록된 응답으로 재실행 (API 호출 한도를 사용하지 않음)
+        geocoder = ReplayGeocoder(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "address_normalizer")
+        sheets_updater = ReplaySheetsUpdater(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "address_normalizer")
+        scheduler = ReplayScheduler(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "address_normalizer")
+    else:
+        recorder = None
+        if GEOCODING_LOG_MODE == 'record':
+            recorder = GeocodingRecorder(GEOCODING_LOG_FILE, "address_normalizer")
+        geocoder = RecordingGeocoder(KakaoGeocoder(KAKAO_API_KEY), recorder)
+        google_sheets = GoogleSheetsUpdater(GOOGLE_CREDENTIALS_FILE)
+        sheets_updater = RecordingSheetsUpdater(google_sheets, recorder) if recorder else google_sheets
+        scheduler = QuotaScheduler("geocoding_quota_state.json")
+        if recorder:
+            scheduler = RecordingScheduler(scheduler, recorder)
     sheets_updater.authenticate()
     
-    # 기존 데이터 가져오기 (A~F열)
-    data_range = f"{SHEET_NAME}!A:F"
+    # 기존 데이터 가져오기 (우선순위 계산을 위해 방문일 컬럼까지 포함)
+    data_range = f"{SHEET_NAME}!A:AH"
     existing_data = sheets_updater.get_sheet_data(SPREADSHEET_ID, data_range)
     
     if not existing_data:
@@ -272,8 +331,8 @@ def main():
     
     print(f"총 {len(existing_data)}행의 데이터를 확인합니다.")
     
-    # 변환 실패한 행들을 찾아서 정규화 후 재시도
-    retry_data = []
+    # 변환 실패한 행들을 찾아서 최근 방문/수정된 행부터 정렬
+    failed_rows = []
     
     for i, row in enumerate(existing_data, 1):
         if i < 2:  # 헤더 행 건너뛰기
@@ -284,31 +343,49 @@ def main():
             
         # E열이 '변환실패'인지 확인
         if len(row) >= 5 and row[4] == "변환실패":
-            original_address = row[3] if len(row) > 3 else ""  # D열의 원본 주소
+            failed_rows.append((i, row))
+    
+    failed_rows = prioritize_rows(existing_data[0], failed_rows)
+    
+    # 정규화 후 재시도
+    retry_data = []
+    
+    for i, row in failed_rows:
+        original_address = row[3] if len(row) > 3 else ""  # D열의 원본 주소
+        
+        if original_address and normalizer.should_normalize(original_address):
+            normalized_address, applied_rules = normalizer.normalize_with_rules(original_address)
             
-            if original_address and normalizer.should_normalize(original_address):
-                normalized_address = normalizer.normalize_address(original_address)
-                
-                print(f"행 {i}: 주소 정규화 시도")
-                print(f"  원본: {original_address}")
-                print(f"  정규화: {normalized_address}")
-                
-                # 정규화된 주소로 다시 변환 시도
-                coordinates = geocoder.geocode_address(normalized_address)
-                
-                if coordinates:
-                    latitude, longitude = coordinates
-                    retry_data.append({
-                        'row': i,
-                        'range': f"{SHEET_NAME}!E{i}:F{i}",
-                        'data': [[latitude, longitude]]
-                    })
-                    print(f"  → 성공: 위도 {latitude}, 경도 {longitude}")
-                else:
-                    print(f"  → 여전히 실패")
-                
-                # API 호출 제한을 위한 대기
-                time.sleep(0.1)
+            print(f"행 {i}: 주소 정규화 시도")
+            print(f"  원본: {original_address}")
+            print(f"  정규화: {normalized_address}")
+            
+            # 정규화된 주소로 다시 변환 시도
+            coordinates, can_continue = geocode_with_quota(
+                geocoder,
+                scheduler,
+                normalized_address,
+                level="normalized",
+                rules=applied_rules
+            )
+            
+            if not can_continue:
+                print("카카오 API 호출 한도에 도달했습니다. 남은 주소는 다음 실행에서 처리합니다.")
+                break
+            
+            if coordinates:
+                latitude, longitude = coordinates
+                retry_data.append({
+                    'row': i,
+                    'range': f"{SHEET_NAME}!E{i}:F{i}",
+                    'data': [[latitude, longitude]]
+                })
+                print(f"  → 성공: 위도 {latitude}, 경도 {longitude}")
+            else:
+                print(f"  → 여전히 실패")
+            
+            # API 호출 제한을 위한 대기
+            time.sleep(0.1)
     
     # 성공한 데이터들을 구글 시트에 업데이트
     if retry_data:
@@ -328,6 +405,17 @@ def main():
     else:
         print("정규화 후 변환 성공한 주소가 없습니다.")
     
+    # 지도용 스냅샷 생성 (앱이 시트 전체 대신 public/data의 압축 파일을 불러오도록)
+    if GEOCODING_LOG_MODE == 'replay':
+        print("재생 모드: 지도 스냅샷 생성을 건너뜁니다.")
+    else:
+        try:
+            # 스냅샷용 읽기는 재생에 필요 없으므로 기록하지 않음
+            snapshot_data = google_sheets.get_sheet_data(SPREADSHEET_ID, f"{SHEET_NAME}!A:AH")
+            publish_snapshot(snapshot_data, SNAPSHOT_OUTPUT_DIR)
+        except Exception as e:
+            print(f"지도 스냅샷 생성 실패: {str(e)}")
+    
     print("모든 작업이 완료되었습니다!")
 
 if __name__ == "__main__":
@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+지오코딩 요청 기록/재생 스크립트
+카카오 API와 구글 시트 요청, 호출 한도 판단을 로컬 로그(JSON Lines)에 기록하고,
+네트워크 없이 로그로 파이프라인을 다시 실행하거나 비용 리포트를 출력합니다.
+
+사용법:
+    python geocoding_recorder.py [로그 파일]    # 비용 리포트 출력
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from geocoding_scheduler import find_visit_date_columns
+from sheet_columns import find_column_index
+
+DEFAULT_LOG_FILE = "geocoding_requests.log.jsonl"
+
+# 기록을 시작할 때 로그에 남겨둘 최대 실행 수 (새 실행 포함)
+MAX_LOG_RUNS = 5
+
+
+class GeocodingRecorder:
+    def __init__(self, log_file: str = DEFAULT_LOG_FILE, script: str = "", max_runs: int = MAX_LOG_RUNS):
+        """
+        요청 기록기 초기화
+        새 실행(run)을 시작하면서 오래된 실행 기록은 정리하고, 최근 max_runs - 1개만 남깁니다.
+
+        Args:
+            log_file (str): 로그 파일 경로
+            script (str): 기록하는 스크립트 이름 (재생 시 실행 선택에 사용)
+            max_runs (int): 로그에 남겨둘 최대 실행 수
+        """
+        self.log_file = log_file
+        self.script = script
+        self.run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._rotate(max_runs)
+        self.record({'kind': 'run_start', 'script': script})
+
+    def _rotate(self, max_runs: int):
+        """최근 max_runs - 1개 실행만 남기고 로그 다시 쓰기"""
+        if not os.path.exists(self.log_file):
+            return
+
+        runs = split_runs(load_log(self.log_file))
+        keep = runs[-(max_runs - 1):] if max_runs > 1 else []
+        if len(keep) == len(runs):
+            return
+
+        temp_file = f"{self.log_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for run in keep:
+                    for entry in run:
+                        f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            os.replace(temp_file, self.log_file)
+        except OSError as e:
+            print(f"요청 로그 정리 실패: {str(e)}")
+
+    def record(self, entry: dict):
+        """
+        요청 1건을 로그에 추가
+
+        Args:
+            entry (dict): 기록할 요청 정보
+        """
+        entry = {'ts': round(time.time(), 3), 'run': self.run_id, **entry}
+        try:
+            with open(self.log_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        except OSError as e:
+            print(f"요청 기록 실패: {str(e)}")
+
+
+def load_log(log_file: str) -> List[dict]:
+    """
+    로그 파일 읽기 (손상된 줄은 건너뜀)
+
+    Args:
+        log_file (str): 로그 파일 경로
+
+    Returns:
+        List[dict]: 기록된 요청 목록
+    """
+    entries = []
+    with open(log_file, 'r', encoding='utf-8') as f:
+        for line_num, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                print(f"로그 {line_num}번째 줄을 읽을 수 없어 건너뜁니다.")
+    return entries
+
+
+def split_runs(entries: List[dict]) -> List[List[dict]]:
+    """
+    로그를 실행(run) 단위로 나누기 (기록 순서 유지)
+
+    Args:
+        entries (List[dict]): load_log()로 읽은 요청 목록
+
+    Returns:
+        List[List[dict]]: 실행별 요청 목록
+    """
+    runs: Dict[Optional[str], List[dict]] = {}
+    for entry in entries:
+        runs.setdefault(entry.get('run'), []).append(entry)
+    return list(runs.values())
+
+
+def load_run(log_file: str, run_id: Optional[str] = None, script: Optional[str] = None) -> List[dict]:
+    """
+    로그에서 실행 하나의 요청만 읽기
+
+    Args:
+        log_file (str): 로그 파일 경로
+        run_id (Optional[str]): 실행 id (None이면 가장 최근 실행)
+        script (Optional[str]): 가장 최근 실행을 찾을 때 이 스크립트의 실행만 대상으로 함
+
+    Returns:
+        List[dict]: 선택한 실행의 요청 목록
+    """
+    runs = split_runs(load_log(log_file))
+
+    def run_start(run):
+        return next((entry for entry in run if entry.get('kind') == 'run_start'), {})
+
+    if run_id is not None:
+        runs = [run for run in runs if run[0].get('run') == run_id]
+    elif script:
+        runs = [run for run in runs if run_start(run).get('script') == script]
+
+    if not runs:
+        raise Exception(f"재생할 실행 기록이 없습니다: {run_id or script or log_file}")
+
+    run = runs[-1]
+    print(f"재생할 실행: {run[0].get('run')} ({run_start(run).get('script', '')})")
+    return run
+
+
+def compact_sheet_values(values: list) -> dict:
+    """
+    재생에 필요한 컬럼(id, D~F열, 방문/수정 날짜)만 남긴 시트 데이터
+    헤더는 그대로 두고, 각 행은 길이와 남길 컬럼 값만 저장합니다.
+
+    Args:
+        values (list): 헤더 행을 포함한 시트 데이터
+
+    Returns:
+        dict: compact 형식의 시트 데이터
+    """
+    if not values:
+        return {'header': [], 'columns': [], 'rows': []}
+
+    header = values[0]
+    columns = {3, 4, 5} | set(find_visit_date_columns(header))
+    id_column = find_column_index(header, ['id', '번호', '순번'])
+    columns.add(id_column if id_column != -1 else 0)
+    columns = sorted(columns)
+
+    rows = []
+    for row in values[1:]:
+        rows.append([len(row)] + [row[column] if column < len(row) else '' for column in columns])
+
+    return {'header': header, 'columns': columns, 'rows': rows}
+
+
+def expand_sheet_values(compact: dict) -> list:
+    """
+    compact_sheet_values()로 줄인 시트 데이터 복원 (저장하지 않은 컬럼은 빈 문자열)
+
+    Args:
+        compact (dict): compact 형식의 시트 데이터
+
+    Returns:
+        list: 헤더 행을 포함한 시트 데이터
+    """
+    if not compact['header'] and not compact['rows']:
+        return []
+
+    values = [compact['header']]
+    for stored in compact['rows']:
+        row = [''] * stored[0]
+        for column, value in zip(compact['columns'], stored[1:]):
+            if column < len(row):
+                row[column] = value
+        values.append(row)
+    return values
+
+
+class RecordingGeocoder:
+    def __init__(self, geocoder, recorder: Optional[GeocodingRecorder] = None):
+        """
+        지오코더 요청 기록 래퍼
+
+        Args:
+            geocoder: KakaoGeocoder 인스턴스
+            recorder (Optional[GeocodingRecorder]): 기록기 (None이면 기록하지 않음)
+        """
+        self.geocoder = geocoder
+        self.recorder = recorder
+        self.last_status_code = None
+        self.last_error = None
+
+    def geocode_address(self, address: str, level: str = "original",
+                        rules: Optional[List[str]] = None) -> Optional[Tuple[float, float]]:
+        """
+        주소를 위도, 경도로 변환하고 요청 정보를 기록
+
+        Args:
+            address (str): 변환할 주소
+            level (str): 정규화 단계 ('original' 또는 'normalized')
+            rules (Optional[List[str]]): 주소에 적용된 정규화 규칙
+
+        Returns:
+            Optional[Tuple[float, float]]: (위도, 경도) 또는 None
+        """
+        start = time.perf_counter()
+        result = self.geocoder.geocode_address(address)
+        latency_ms = round((time.perf_counter() - start) * 1000, 1)
+        self.last_status_code = self.geocoder.last_status_code
+        self.last_error = getattr(self.geocoder, 'last_error', None)
+
+        if self.recorder:
+            self.recorder.record({
+                'kind': 'geocode',
+                'address': address,
+                'level': level,
+                'rules': rules or [],
+                'latency_ms': latency_ms,
+                'status': self.last_status_code,
+                'error': self.last_error,
+                'result': list(result) if result else None,
+            })
+
+        return result
+
+
+class RecordingSheetsUpdater:
+    def __init__(self, sheets_updater, recorder: GeocodingRecorder):
+        """
+        구글 시트 요청 기록 래퍼
+
+        Args:
+            sheets_updater: GoogleSheetsUpdater 인스턴스
+            recorder (GeocodingRecorder): 기록기
+        """
+        self.sheets_updater = sheets_updater
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.sheets_updater, name)
+
+    def get_sheet_data(self, spreadsheet_id: str, range_name: str) -> list:
+        """시트 데이터를 가져오고 재생에 필요한 컬럼만 기록"""
+        start = time.perf_counter()
+        values = self.sheets_updater.get_sheet_data(spreadsheet_id, range_name)
+        self.recorder.record({
+            'kind': 'sheet_read',
+            'range': range_name,
+            'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+            'values': compact_sheet_values(values),
+        })
+        return values
+
+    def update_sheet_data(self, spreadsheet_id: str, range_name: str, values: list, max_retries=3):
+        """시트 데이터를 업데이트하고 소요 시간을 기록"""
+        start = time.perf_counter()
+        try:
+            self.sheets_updater.update_sheet_data(spreadsheet_id, range_name, values, max_retries)
+        finally:
+            self.recorder.record({
+                'kind': 'sheet_update',
+                'range': range_name,
+                'latency_ms': round((time.perf_counter() - start) * 1000, 1),
+                'values': values,
+            })
+
+
+class RecordingScheduler:
+    def __init__(self, scheduler, recorder: GeocodingRecorder):
+        """
+        호출 한도 스케줄러 기록 래퍼
+        재생 시 같은 행을 같은 순서로 처리하도록 한도 판단 결과를 기록합니다.
+
+        Args:
+            scheduler: QuotaScheduler 인스턴스
+            recorder (GeocodingRecorder): 기록기
+        """
+        self.scheduler = scheduler
+        self.recorder = recorder
+
+    def _record(self, op: str, value):
+        self.recorder.record({'kind': 'quota', 'op': op, 'value': value})
+        return value
+
+    def remaining_today(self) -> int:
+        """오늘 남은 호출 수를 기록"""
+        return self._record('remaining', self.scheduler.remaining_today())
+
+    def acquire(self) -> bool:
+        """호출 할당 결과를 기록"""
+        return self._record('acquire', self.scheduler.acquire())
+
+    def wait_for_retry(self, attempt: int) -> bool:
+        """재시도 여부를 기록"""
+        return self._record('retry', self.scheduler.wait_for_retry(attempt))
+
+    def mark_quota_exceeded(self):
+        """일일 한도 초과 기록 (재생 시에는 사용하지 않으므로 로그에 남기지 않음)"""
+        self.scheduler.mark_quota_exceeded()
+
+
+class ReplayScheduler:
+    def __init__(self, log_file: str = DEFAULT_LOG_FILE, run_id: Optional[str] = None,
+                 script: Optional[str] = None):
+        """
+        기록된 한도 판단 결과로 동작하는 스케줄러 (대기하지 않고, 상태 파일을 사용하지 않음)
+        기록이 모두 소진되면 더 이상 호출할 수 없는 것으로 처리합니다.
+
+        Args:
+            log_file (str): 로그 파일 경로
+            run_id (Optional[str]): 재생할 실행 id (None이면 가장 최근 실행)
+            script (Optional[str]): 가장 최근 실행을 찾을 스크립트 이름
+        """
+        self.decisions: Dict[str, deque] = defaultdict(deque)
+
+        for entry in load_run(log_file, run_id, script):
+            if entry.get('kind') == 'quota':
+                self.decisions[entry['op']].append(entry['value'])
+
+    def _next(self, op: str, default):
+        queue = self.decisions[op]
+        return queue.popleft() if queue else default
+
+    def remaining_today(self) -> int:
+        """기록된 남은 호출 수"""
+        return self._next('remaining', 0)
+
+    def acquire(self) -> bool:
+        """기록된 호출 할당 결과"""
+        return self._next('acquire', False)
+
+    def wait_for_retry(self, attempt: int) -> bool:
+        """기록된 재시도 여부 (대기하지 않음)"""
+        return self._next('retry', False)
+
+    def mark_quota_exceeded(self):
+        """재생 모드에서는 상태 파일을 수정하지 않음"""
+
+
+class ReplayGeocoder:
+    def __init__(self, log_file: str = DEFAULT_LOG_FILE, run_id: Optional[str] = None,
+                 script: Optional[str] = None):
+        """
+        기록된 응답으로 동작하는 지오코더 (네트워크 사용 안 함)
+        같은 주소가 여러 번 기록된 경우 기록된 순서대로 응답하고,
+        기록이 모두 소진되면 마지막 응답을 반복합니다.
+
+        Args:
+            log_file (str): 로그 파일 경로
+            run_id (Optional[str]): 재생할 실행 id (None이면 가장 최근 실행)
+            script (Optional[str]): 가장 최근 실행을 찾을 스크립트 이름
+        """
+        self.responses: Dict[str, deque] = defaultdict(deque)
+        self.last_responses: Dict[str, dict] = {}
+        self.last_status_code = None
+        self.last_error = None
+
+        for entry in load_run(log_file, run_id, script):
+            if entry.get('kind') == 'geocode':
+                self.responses[entry['address']].append(entry)
+
+    def geocode_address(self, address: str, level: str = "original",
+                        rules: Optional[List[str]] = None) -> Optional[Tuple[float, float]]:
+        """
+        기록된 응답으로 주소 변환
+
+        Args:
+            address (str): 변환할 주소
+            level (str): 정규화 단계 (재생 시 사용하지 않음)
+            rules (Optional[List[str]]): 정규화 규칙 (재생 시 사용하지 않음)
+
+        Returns:
+            Optional[Tuple[float, float]]: 기록된 (위도, 경도) 또는 None
+        """
+        queue = self.responses.get(address)
+        if queue:
+            entry = queue.popleft()
+            self.last_responses[address] = entry
+        else:
+            entry = self.last_responses.get(address)
+
+        if entry is None:
+            print(f"기록된 응답이 없습니다: {address}")
+            self.last_status_code = None
+            self.last_error = None
+            return None
+
+        self.last_status_code = entry.get('status')
+        self.last_error = entry.get('error')
+        result = entry.get('result')
+        return tuple(result) if result else None
+
+
+class ReplaySheetsUpdater:
+    def __init__(self, log_file: str = DEFAULT_LOG_FILE, run_id: Optional[str] = None,
+                 script: Optional[str] = None):
+        """
+        기록된 시트 데이터로 동작하는 시트 업데이터 (네트워크 사용 안 함, 업데이트는 출력만 함)
+
+        Args:
+            log_file (str): 로그 파일 경로
+            run_id (Optional[str]): 재생할 실행 id (None이면 가장 최근 실행)
+            script (Optional[str]): 가장 최근 실행을 찾을 스크립트 이름
+        """
+        self.reads: Dict[str, deque] = defaultdict(deque)
+        self.last_reads: Dict[str, list] = {}
+
+        for entry in load_run(log_file, run_id, script):
+            if entry.get('kind') == 'sheet_read':
+                self.reads[entry['range']].append(expand_sheet_values(entry['values']))
+
+    def authenticate(self):
+        """재생 모드에서는 인증하지 않음"""
+        print("재생 모드: 구글 API 인증을 건너뜁니다.")
+
+    def get_sheet_data(self, spreadsheet_id: str, range_name: str) -> list:
+        """기록된 시트 데이터 반환 (같은 범위는 기록 순서대로, 소진되면 마지막 값)"""
+        queue = self.reads.get(range_name)
+        if queue:
+            self.last_reads[range_name] = queue.popleft()
+
+        if range_name not in self.last_reads:
+            raise Exception(f"기록된 시트 데이터가 없습니다: {range_name}")
+
+        return self.last_reads[range_name]
+
+    def update_sheet_data(self, spreadsheet_id: str, range_name: str, values: list, max_retries=3):
+        """재생 모드에서는 시트를 수정하지 않음"""
+        print(f"재생 모드: {range_name} 업데이트 건너뜀 ({values})")
+
+
+def build_report(entries: List[dict], top: int = 20) -> str:
+    """
+    기록된 지오코딩 요청의 비용 리포트 생성
+
+    Args:
+        entries (List[dict]): load_log()로 읽은 요청 목록
+        top (int): 주소 순위에 표시할 개수
+
+    Returns:
+        str: 리포트 문자열
+    """
+    geocodes = [entry for entry in entries if entry.get('kind') == 'geocode']
+    sheet_requests = [entry for entry in entries if entry.get('kind') in ('sheet_read', 'sheet_update')]
+
+    lines = ["=== 지오코딩 비용 리포트 ==="]
+    if not geocodes:
+        lines.append("기록된 지오코딩 요청이 없습니다.")
+        return '\n'.join(lines)
+
+    total_ms = sum(entry.get('latency_ms', 0) for entry in geocodes)
+    failures = [entry for entry in geocodes if not entry.get('result')]
+    status_counts = defaultdict(int)
+    for entry in geocodes:
+        status_counts[str(entry.get('status'))] += 1
+
+    lines.append(f"기록된 실행: {len(split_runs(entries))}회")
+    lines.append(f"카카오 API 호출: {len(geocodes)}회, 총 {total_ms / 1000:.1f}초, 실패 {len(failures)}회")
+    lines.append("응답 코드: " + ', '.join(f"{status} {count}회" for status, count in sorted(status_counts.items())))
+    if sheet_requests:
+        sheet_ms = sum(entry.get('latency_ms', 0) for entry in sheet_requests)
+        lines.append(f"구글 시트 요청: {len(sheet_requests)}회, 총 {sheet_ms / 1000:.1f}초")
+
+    # 같은 주소를 여러 번 호출한 경우 캐시로 줄일 수 있는 호출 수
+    address_stats = defaultdict(lambda: {'calls': 0, 'failures': 0, 'latency_ms': 0.0, 'level': ''})
+    for entry in geocodes:
+        stats = address_stats[entry['address']]
+        stats['calls'] += 1
+        stats['failures'] += 0 if entry.get('result') else 1
+        stats['latency_ms'] += entry.get('latency_ms', 0)
+        stats['level'] = entry.get('level', '')
+    repeated_calls = sum(stats['calls'] - 1 for stats in address_stats.values())
+    lines.append(f"중복 호출 (캐시 시 절약 가능): {repeated_calls}회")
+
+    lines.append(f"\n--- 비용이 큰 주소 상위 {top}개 (총 소요 시간 순) ---")
+    ranked = sorted(address_stats.items(), key=lambda item: (-item[1]['latency_ms'], -item[1]['calls']))
+    for address, stats in ranked[:top]:
+        lines.append(f"{stats['latency_ms']:8.1f}ms  호출 {stats['calls']}회  실패 {stats['failures']}회  "
+                     f"[{stats['level']}] {address}")
+
+    lines.append("\n--- 정규화 단계/규칙별 비용 ---")
+    rule_stats = defaultdict(lambda: {'calls': 0, 'successes': 0, 'latency_ms': 0.0})
+    for entry in geocodes:
+        keys = [f"단계: {entry.get('level', 'original')}"]
+        keys += [f"규칙: {rule}" for rule in entry.get('rules', [])]
+        for key in keys:
+            stats = rule_stats[key]
+            stats['calls'] += 1
+            stats['successes'] += 1 if entry.get('result') else 0
+            stats['latency_ms'] += entry.get('latency_ms', 0)
+    for key, stats in sorted(rule_stats.items(), key=lambda item: -item[1]['latency_ms']):
+        success_rate = stats['successes'] / stats['calls'] * 100
+        lines.append(f"{stats['latency_ms']:8.1f}ms  호출 {stats['calls']}회  성공률 {success_rate:5.1f}%  "
+                     f"평균 {stats['latency_ms'] / stats['calls']:.1f}ms  {key}")
+
+    return '\n'.join(lines)
+
+
+def main():
+    log_file = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_LOG_FILE
+
+    if not os.path.exists(log_file):
+        print(f"로그 파일이 없습니다: {log_file}")
+        print("geocoding_script.py 또는 address_normalizer.py의 GEOCODING_LOG_MODE를 'record'로 설정한 뒤 실행하세요.")
+        return
+
+    print(build_report(load_log(log_file)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+지오코딩 작업 스케줄러
+카카오 API 일일/분당 호출 한도를 실행 간에 유지되는 상태 파일로 추적하고,
+최근 방문/수정된 행부터 우선 처리하도록 작업 순서를 정합니다.
+"""
+
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from sheet_columns import find_column_index
+
+# 카카오 API 호출 한도는 한국 시간 자정에 초기화됨 (서머타임 없음)
+KST = timezone(timedelta(hours=9), 'KST')
+
+# 429(요청 제한) 응답 시 재시도 횟수와 첫 대기 시간(초, 재시도마다 2배)
+THROTTLE_RETRIES = 4
+THROTTLE_BACKOFF_SECONDS = 5
+
+# 방문일 관련 헤더 (src/lib/googleSheets.ts의 컬럼 매핑과 동일한 검색어)
+VISIT_DATE_HEADERS = [
+    ['최종방문일자', '마지막방문'],
+    ['1차 방문', '1차'],
+    ['2차 방문', '2차'],
+    ['3차 방문', '3차'],
+    ['4차 방문', '4차'],
+    ['5차 방문', '5차'],
+    ['6차 방문', '6차'],
+    ['최종 업데이트', '업데이트'],
+]
+
+
+def parse_visit_date(value: str) -> Optional[date]:
+    """
+    시트의 날짜 문자열을 date로 변환
+
+    Args:
+        value (str): 날짜 문자열 (예: '2024-03-20', '2024.3.20', '2024/03/20')
+
+    Returns:
+        Optional[date]: 변환된 날짜 또는 None
+    """
+    if not value:
+        return None
+
+    match = re.search(r'(\d{4})\s*[-./년]\s*(\d{1,2})\s*[-./월]\s*(\d{1,2})', str(value))
+    if not match:
+        return None
+
+    try:
+        return date(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+    except ValueError:
+        return None
+
+
+def get_row_priority_date(row: list, date_columns: List[int]) -> Optional[date]:
+    """
+    행의 방문/수정 날짜 중 가장 최근 날짜 반환
+
+    Args:
+        row (list): 시트 행 데이터
+        date_columns (List[int]): 날짜 컬럼 인덱스 목록
+
+    Returns:
+        Optional[date]: 가장 최근 날짜 또는 None
+    """
+    latest = None
+    for column in date_columns:
+        if column < 0 or column >= len(row):
+            continue
+        parsed = parse_visit_date(row[column])
+        if parsed and (latest is None or parsed > latest):
+            latest = parsed
+    return latest
+
+
+def find_visit_date_columns(headers: list) -> List[int]:
+    """
+    방문/수정 날짜 컬럼 인덱스 찾기
+
+    Args:
+        headers (list): 헤더 행
+
+    Returns:
+        List[int]: 찾은 날짜 컬럼 인덱스 목록
+    """
+    # '1차 방문 내용' 같은 내용 컬럼은 날짜 컬럼이 아니므로 제외
+    date_columns = [find_column_index(headers, terms, exclude=['내용']) for terms in VISIT_DATE_HEADERS]
+    return [column for column in date_columns if column != -1]
+
+
+def prioritize_rows(headers: list, rows: List[Tuple[int, list]]) -> List[Tuple[int, list]]:
+    """
+    최근 방문/수정된 행이 먼저 오도록 정렬합니다.
+    날짜 정보가 없는 행은 시트 순서대로 맨 뒤에 배치됩니다.
+
+    Args:
+        headers (list): 헤더 행
+        rows (List[Tuple[int, list]]): (행 번호, 행 데이터) 목록
+
+    Returns:
+        List[Tuple[int, list]]: 우선순위 순으로 정렬된 목록
+    """
+    date_columns = find_visit_date_columns(headers)
+
+    if not date_columns:
+        return list(rows)
+
+    def sort_key(item):
+        row_num, row = item
+        latest = get_row_priority_date(row, date_columns)
+        # 날짜가 있는 행 먼저, 최근 날짜 먼저, 같으면 시트 순서
+        return (latest is None, -(latest.toordinal() if latest else 0), row_num)
+
+    return sorted(rows, key=sort_key)
+
+
+class QuotaScheduler:
+    def __init__(self, state_file: str = "geocoding_quota_state.json", daily_limit: int = 100000,
+                 per_minute_limit: int = 300, daily_reserve: int = 0):
+        """
+        카카오 API 호출 한도 스케줄러 초기화
+        상태 파일은 여러 스크립트가 동시에 사용할 수 있도록 잠금 후 매번 다시 읽습니다.
+
+        Args:
+            state_file (str): 실행 간 호출 기록을 저장할 상태 파일 경로
+            daily_limit (int): 일일 최대 호출 횟수
+            per_minute_limit (int): 분당 최대 호출 횟수
+            daily_reserve (int): 웹 앱 등 다른 용도로 남겨둘 일일 호출 수
+        """
+        self.state_file = state_file
+        self.lock_file = f"{state_file}.lock"
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self.daily_reserve = daily_reserve
+        self.state = self._load_state()
+
+    @staticmethod
+    def _today() -> str:
+        """한국 시간 기준 오늘 날짜"""
+        return datetime.fromtimestamp(time.time(), KST).date().isoformat()
+
+    @contextmanager
+    def _locked(self):
+        """상태 파일 잠금 (다른 프로세스가 사용 중이면 대기)"""
+        with open(self.lock_file, 'a+') as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _load_state(self) -> dict:
+        """상태 파일 읽기 (없거나 손상된 경우 새 상태로 시작)"""
+        state = {'date': self._today(), 'daily_count': 0, 'recent_calls': []}
+
+        if not os.path.exists(self.state_file):
+            return state
+
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            state.update(saved)
+        except (OSError, ValueError) as e:
+            print(f"호출 한도 상태 파일 읽기 실패, 새로 시작합니다: {str(e)}")
+
+        return state
+
+    def _save_state(self):
+        """상태 파일 저장 (임시 파일에 쓴 뒤 교체)"""
+        temp_file = f"{self.state_file}.tmp"
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False)
+            os.replace(temp_file, self.state_file)
+        except OSError as e:
+            print(f"호출 한도 상태 파일 저장 실패: {str(e)}")
+
+    def _refresh(self):
+        """
+        다른 프로세스의 기록을 반영하기 위해 상태 파일을 다시 읽고,
+        날짜가 바뀌었으면 일일 호출 수 초기화, 1분이 지난 호출 기록 정리
+        (잠금 안에서 호출해야 함)
+        """
+        self.state = self._load_state()
+
+        today = self._today()
+        if self.state.get('date') != today:
+            self.state['date'] = today
+            self.state['daily_count'] = 0
+
+        now = time.time()
+        self.state['recent_calls'] = [t for t in self.state.get('recent_calls', []) if now - t < 60]
+
+    def _remaining(self) -> int:
+        """남은 호출 수 계산 (잠금 안에서 _refresh() 후 호출)"""
+        return max(0, self.daily_limit - self.daily_reserve - self.state['daily_count'])
+
+    def remaining_today(self) -> int:
+        """
+        오늘 남은 호출 가능 횟수
+
+        Returns:
+            int: 남은 호출 수 (예약분 제외)
+        """
+        with self._locked():
+            self._refresh()
+            return self._remaining()
+
+    def acquire(self) -> bool:
+        """
+        API 호출 1회를 할당받습니다.
+        분당 한도에 도달하면 여유가 생길 때까지 대기하고,
+        일일 한도에 도달하면 False를 반환합니다.
+
+        Returns:
+            bool: 호출 가능 여부
+        """
+        while True:
+            with self._locked():
+                self._refresh()
+                if self._remaining() <= 0:
+                    return False
+
+                recent_calls = self.state['recent_calls']
+                if len(recent_calls) < self.per_minute_limit:
+                    self.state['daily_count'] += 1
+                    recent_calls.append(time.time())
+                    self._save_state()
+                    return True
+
+                wait_seconds = 60 - (time.time() - min(recent_calls))
+
+            # 다른 프로세스가 기다리는 동안 호출할 수 있도록 잠금을 풀고 대기
+            print(f"분당 호출 한도 도달. {max(wait_seconds, 0):.1f}초 대기...")
+            time.sleep(max(wait_seconds, 0.1))
+
+    def wait_for_retry(self, attempt: int) -> bool:
+        """
+        요청 제한(429) 응답 후 재시도 전 대기
+
+        Args:
+            attempt (int): 지금까지의 재시도 횟수 (0부터)
+
+        Returns:
+            bool: 재시도 여부 (최대 재시도 횟수를 넘으면 False)
+        """
+        if attempt >= THROTTLE_RETRIES:
+            return False
+        wait_seconds = THROTTLE_BACKOFF_SECONDS * (2 ** attempt)
+        print(f"카카오 API 요청 제한. {wait_seconds}초 후 재시도합니다... ({attempt + 1}/{THROTTLE_RETRIES})")
+        time.sleep(wait_seconds)
+        return True
+
+    def mark_quota_exceeded(self):
+        """API가 일일 한도 초과를 응답한 경우 오늘 남은 호출을 모두 사용한 것으로 기록"""
+        with self._locked():
+            self._refresh()
+            self.state['daily_count'] = max(self.state['daily_count'], self.daily_limit)
+            self._save_state()
+        print("카카오 API 일일 호출 한도 초과. 남은 작업은 다음 실행에서 이어서 처리합니다.")
+
+
+def is_daily_quota_error(error: Optional[dict]) -> bool:
+    """
+    429 응답 본문이 일일 한도 초과인지 확인
+    로컬 API(dapi.kakao.com)는 쿼터를 모두 사용하면
+    {"errorType": "RequestThrottled", "message": "API limit has been exceeded."}를 응답하고,
+    카카오 플랫폼 공통 형식은 {"code": -10, "msg": "API_LIMIT_EXCEED"}입니다.
+    본문을 알 수 없는 429만 일시적인 요청 제한으로 보고 재시도합니다.
+
+    Args:
+        error (Optional[dict]): 카카오 API 오류 응답 본문
+
+    Returns:
+        bool: 일일 한도 초과 여부
+    """
+    if not error:
+        return False
+    if error.get('errorType') == 'RequestThrottled' or error.get('code') == -10:
+        return True
+    message = f"{error.get('msg', '')} {error.get('message', '')}".lower()
+    return 'api_limit_exceed' in message or 'limit has been exceeded' in message or '일일' in message
+
+
+def geocode_with_quota(geocoder, scheduler, address: str, **kwargs) -> Tuple[Optional[Tuple[float, float]], bool]:
+    """
+    호출 한도를 지키면서 주소 변환
+    일일 한도 초과(429) 시 오늘 호출을 중단하고, 원인을 알 수 없는 429는 대기 후 재시도합니다.
+    재시도 후에도 계속 429이면 한도를 모두 사용한 것으로 보고 오늘 호출을 중단합니다.
+
+    Args:
+        geocoder: KakaoGeocoder 또는 같은 인터페이스의 지오코더
+        scheduler: QuotaScheduler 또는 같은 인터페이스의 스케줄러 (None이면 한도 추적 안 함)
+        address (str): 변환할 주소
+        **kwargs: geocoder.geocode_address()에 전달할 추가 인자
+
+    Returns:
+        Tuple[Optional[Tuple[float, float]], bool]: ((위도, 경도) 또는 None, 계속 진행 가능 여부)
+        계속 진행할 수 없으면 결과를 실패로 기록하지 말고 다음 실행으로 미뤄야 합니다.
+    """
+    attempt = 0
+    while True:
+        if scheduler and not scheduler.acquire():
+            return None, False
+
+        coordinates = geocoder.geocode_address(address, **kwargs)
+        if geocoder.last_status_code != 429:
+            return coordinates, True
+
+        if scheduler is None:
+            return None, False
+        if is_daily_quota_error(getattr(geocoder, 'last_error', None)):
+            scheduler.mark_quota_exceeded()
+            return None, False
+        if not scheduler.wait_for_retry(attempt):
+            print("요청 제한이 계속되어 남은 작업은 다음 실행에서 처리합니다.")
+            scheduler.mark_quota_exceeded()
+            return None, False
+        attempt += 1
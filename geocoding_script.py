@@ -14,6 +14,10 @@ import pandas as pd
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 import os
+from geocoding_scheduler import QuotaScheduler, geocode_with_quota, prioritize_rows
+from map_snapshot import publish_snapshot
+from geocoding_recorder import (DEFAULT_LOG_FILE, GeocodingRecorder, RecordingGeocoder, RecordingScheduler,
+                                RecordingSheetsUpdater, ReplayGeocoder, ReplayScheduler, ReplaySheetsUpdater)
 
 def normalize_address(address: str) -> str:
     """
@@ -72,6 +76,8 @@ class KakaoGeocoder:
         self.headers = {
             "Authorization": f"KakaoAK {api_key}"
         }
+        self.last_status_code = None
+        self.last_error = None
     
     def geocode_address(self, address: str) -> Optional[Tuple[float, float]]:
         """
@@ -83,6 +89,8 @@ class KakaoGeocoder:
         Returns:
             Optional[Tuple[float, float]]: (위도, 경도) 또는 None
         """
+        self.last_status_code = None
+        self.last_error = None
         try:
             params = {
                 "query": address
@@ -94,6 +102,7 @@ class KakaoGeocoder:
                 params=params,
                 timeout=10
             )
+            self.last_status_code = response.status_code
             
             if response.status_code == 200:
                 data = response.json()
@@ -109,6 +118,10 @@ class KakaoGeocoder:
                     return None
             else:
                 print(f"API 요청 실패: {response.status_code}")
+                try:
+                    self.last_error = response.json()
+                except ValueError:
+                    self.last_error = None
                 return None
                 
         except Exception as e:
@@ -241,9 +254,11 @@ class GoogleSheetsUpdater:
                 print(f"청크 업데이트 실패: {str(e)}")
                 continue
 
-def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: KakaoGeocoder, sheets_updater: GoogleSheetsUpdater, chunk_size=50):
+def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: KakaoGeocoder, sheets_updater: GoogleSheetsUpdater, chunk_size=50, scheduler: Optional[QuotaScheduler] = None):
     """
     E열이 '변환실패'인 행들의 주소를 다시 지오코딩하여 좌표를 추가합니다.
+    최근 방문/수정된 행부터 처리하며, 스케줄러가 주어지면 일일 호출 한도에
+    도달했을 때 나머지 행은 다음 실행으로 미룹니다.
     
     Args:
         spreadsheet_id (str): 스프레드시트 ID
@@ -251,11 +266,12 @@ def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: K
         geocoder (KakaoGeocoder): 지오코더 인스턴스
         sheets_updater (GoogleSheetsUpdater): 시트 업데이터 인스턴스
         chunk_size (int): 한 번에 처리할 행 수
+        scheduler (Optional[QuotaScheduler]): 호출 한도 스케줄러
     """
     print("\n=== E열 '변환실패' 주소 재지오코딩 시작 ===")
     
-    # 전체 데이터 가져오기 (A~F열)
-    data_range = f"{sheet_name}!A:F"
+    # 전체 데이터 가져오기 (우선순위 계산을 위해 방문일 컬럼까지 포함)
+    data_range = f"{sheet_name}!A:AH"
     all_data = sheets_updater.get_sheet_data(spreadsheet_id, data_range)
     
     if not all_data:
@@ -268,7 +284,9 @@ def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: K
         if i == 1:  # 헤더 행은 건너뛰기
             continue
         if len(row) >= 5 and row[4] == "변환실패":  # E열이 '변환실패'인 경우
-            failed_rows.append((i, row))
+            # D열 주소가 없는 행은 호출 한도를 차지하지 않도록 미리 제외
+            if row[3].strip():
+                failed_rows.append((i, row))
     
     if not failed_rows:
         print("E열이 '변환실패'인 주소가 없습니다.")
@@ -276,8 +294,23 @@ def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: K
     
     print(f"E열이 '변환실패'인 주소 {len(failed_rows)}개를 찾았습니다.")
     
+    # 최근 방문/수정된 행부터 처리
+    failed_rows = prioritize_rows(all_data[0], failed_rows)
+    
+    if scheduler:
+        # 오늘 남은 호출 수만큼만 진행
+        remaining = scheduler.remaining_today()
+        if remaining <= 0:
+            print("오늘 사용할 수 있는 카카오 API 호출이 없습니다. 다음 실행에서 처리합니다.")
+            return
+        if len(failed_rows) > remaining:
+            print(f"오늘 남은 호출 수({remaining}회)만큼 우선순위가 높은 주소부터 처리합니다. "
+                  f"나머지 {len(failed_rows) - remaining}개는 다음 실행에서 처리합니다.")
+            failed_rows = failed_rows[:remaining]
+    
     # 50행씩 청크로 나누어 처리
     total_failed = len(failed_rows)
+    quota_exhausted = False
     
     for chunk_start in range(0, total_failed, chunk_size):
         chunk_end = min(chunk_start + chunk_size, total_failed)
@@ -290,18 +323,17 @@ def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: K
         chunk_row_numbers = []
         
         for row_num, row in chunk_failed_rows:
-            if len(row) < 4:
-                continue
-                
             original_address = row[3]  # D열의 원본 주소
             
-            if not original_address or original_address.strip() == "":
-                continue
-            
             print(f"행 {row_num}: '{original_address}'")
             
             # 원본 주소로 바로 지오코딩 시도
-            coordinates = geocoder.geocode_address(original_address)
+            coordinates, can_continue = geocode_with_quota(geocoder, scheduler, original_address)
+            
+            if not can_continue:
+                # 한도 초과는 실패로 기록하지 않고 다음 실행으로 미룸
+                quota_exhausted = True
+                break
             
             if coordinates:
                 latitude, longitude = coordinates
@@ -331,6 +363,10 @@ def process_failed_coordinates(spreadsheet_id: str, sheet_name: str, geocoder: K
         else:
             print(f"청크 {chunk_start//chunk_size + 1}에서 처리할 주소가 없습니다.")
         
+        if quota_exhausted:
+            print("호출 한도에 도달하여 남은 주소는 다음 실행에서 처리합니다.")
+            break
+        
         # 다음 청크 처리 전 대기
         if chunk_end < total_failed:
             print("다음 청크 처리 전 3초 대기...")
@@ -344,6 +380,10 @@ def main():
     GOOGLE_CREDENTIALS_FILE = "google-service-account-key.json"
     SPREADSHEET_ID = "12pcRCN5bqqupjtVi06O3iW6VG8Q1Xr9qWV51ORUMyIA"  # 구글 시트 ID를 입력하세요 (URL에서 확인)
     SHEET_NAME = "시트1"  # 시트 이름을 입력하세요
+    GEOCODING_LOG_MODE = None  # 요청 기록: 'record', 기록으로 재실행(네트워크 없음): 'replay'
+    GEOCODING_LOG_FILE = DEFAULT_LOG_FILE
+    GEOCODING_REPLAY_RUN = None  # 재생할 실행 id (None이면 이 스크립트의 가장 최근 실행)
+    SNAPSHOT_OUTPUT_DIR = "public/data"  # 지도 스냅샷 출력 위치 (앱 빌드 전에 생성되어야 배포에 포함됨)
     
     # 설정값 검증
     if KAKAO_API_KEY == "YOUR_KAKAO_REST_API_KEY":
@@ -363,15 +403,42 @@ def main():
     
     print("주소-좌표 변환 스크립트 시작")
     
-    # 카카오 지오코더 초기화
-    geocoder = KakaoGeocoder(KAKAO_API_KEY)
-    
-    # 구글 시트 업데이터 초기화
-    sheets_updater = GoogleSheetsUpdater(GOOGLE_CREDENTIALS_FILE)
+    if GEOCODING_LOG_MODE == 'replay':
+        # 기록된 응답으로 재실행 (네트워크와 API 호출 한도를 사용하지 않음)
+        geocoder = ReplayGeocoder(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "geocoding_script")
+        sheets_updater = ReplaySheetsUpdater(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "geocoding_script")
+        scheduler = ReplayScheduler(GEOCODING_LOG_FILE, GEOCODING_REPLAY_RUN, "geocoding_script")
+    else:
+        recorder = None
+        if GEOCODING_LOG_MODE == 'record':
+            recorder = GeocodingRecorder(GEOCODING_LOG_FILE, "geocoding_script")
+        
+        # 카카오 지오코더 초기화
+        geocoder = RecordingGeocoder(KakaoGeocoder(KAKAO_API_KEY), recorder)
+        
+        # 구글 시트 업데이터 초기화
+        google_sheets = GoogleSheetsUpdater(GOOGLE_CREDENTIALS_FILE)
+        sheets_updater = RecordingSheetsUpdater(google_sheets, recorder) if recorder else google_sheets
+        
+        # 호출 한도 스케줄러 초기화 (실행 간 호출 기록은 상태 파일에 유지)
+        scheduler = QuotaScheduler("geocoding_quota_state.json")
+        if recorder:
+            scheduler = RecordingScheduler(scheduler, recorder)
     sheets_updater.authenticate()
     
     # E열이 '변환실패'인 주소들 재지오코딩
-    process_failed_coordinates(SPREADSHEET_ID, SHEET_NAME, geocoder, sheets_updater)
+    process_failed_coordinates(SPREADSHEET_ID, SHEET_NAME, geocoder, sheets_updater, scheduler=scheduler)
+    
+    # 지도용 스냅샷 생성 (앱이 시트 전체 대신 public/data의 압축 파일을 불러오도록)
+    if GEOCODING_LOG_MODE == 'replay':
+        print("재생 모드: 지도 스냅샷 생성을 건너뜁니다.")
+    else:
+        try:
+            # 스냅샷용 읽기는 재생에 필요 없으므로 기록하지 않음
+            snapshot_data = google_sheets.get_sheet_data(SPREADSHEET_ID, f"{SHEET_NAME}!A:AH")
+            publish_snapshot(snapshot_data, SNAPSHOT_OUTPUT_DIR)
+        except Exception as e:
+            print(f"지도 스냅샷 생성 실패: {str(e)}")
     
     print("모든 작업이 완료되었습니다!")
 
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+지도 스냅샷 생성 스크립트
+시트 데이터 중 지도 표시에 필요한 필드(id, 의원명, 위도/경도, 세일즈 단계, 지역)만
+컬럼 단위로 압축한 스냅샷과 이전 버전 대비 변경분(delta) 파일을 생성합니다.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sheet_columns import find_column_index
+
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_FILE = "hospitals-snapshot.json.gz"
+DELTA_FILE = "hospitals-delta.json.gz"
+MANIFEST_FILE = "hospitals-manifest.json"
+
+# 스냅샷 필드별 헤더 검색어와 기본 컬럼 인덱스
+# id, 의원명, 세일즈 단계는 src/lib/googleSheets.ts의 columnMap과 동일하고,
+# 주소와 좌표는 지오코딩 스크립트가 사용하는 D, E, F열을 기본값으로 사용
+SNAPSHOT_COLUMNS = {
+    'id': (['id', '번호', '순번'], 0),
+    'name': (['의원명', '병원명', 'hospital', 'name'], 2),
+    'address': (['주소', 'address'], 3),
+    'lat': (['위도', 'lat'], 4),
+    'lng': (['경도', 'lng'], 5),
+    'status': (['세일즈 단계', '단계', 'stage'], 10),
+}
+
+# 컬럼 순서 (딕셔너리 인코딩되는 필드는 *_values에 고유값 목록을 저장)
+SNAPSHOT_FIELDS = ['id', 'name', 'lat', 'lng', 'status', 'region']
+DICTIONARY_FIELDS = ['status', 'region']
+
+
+def _cell(row: list, index: int) -> str:
+    """행에서 셀 값 가져오기 (범위를 벗어나면 빈 문자열)"""
+    if index < 0 or index >= len(row):
+        return ''
+    return str(row[index]).strip()
+
+
+def _parse_coordinate(value: str) -> Optional[float]:
+    """좌표 문자열을 소수점 6자리 float로 변환 ('변환실패' 등은 None)"""
+    try:
+        return round(float(value), 6)
+    except (TypeError, ValueError):
+        return None
+
+
+def extract_region(address: str) -> str:
+    """
+    주소에서 지역(시/도 + 시/군/구) 추출
+
+    Args:
+        address (str): 주소 (예: '서울시 강남구 테헤란로 123')
+
+    Returns:
+        str: 지역 (예: '서울시 강남구')
+    """
+    return ' '.join(address.split()[:2])
+
+
+def _column_map(headers: list) -> Dict[str, int]:
+    """헤더에서 스냅샷 필드별 컬럼 인덱스 찾기 (없으면 기본 인덱스)"""
+    column_map = {}
+    for field, (search_terms, default_index) in SNAPSHOT_COLUMNS.items():
+        index = find_column_index(headers, search_terms)
+        column_map[field] = index if index != -1 else default_index
+    return column_map
+
+
+def find_id_problems(all_data: list) -> List[str]:
+    """
+    변경분을 id 기준으로 적용할 수 있는지 확인
+    id가 비어 있으면 행 위치로 만든 기본 id가 사용되어 행이 추가/삭제될 때마다 바뀌고,
+    중복된 id는 앱에서 어느 행에 적용할지 알 수 없습니다.
+
+    Args:
+        all_data (list): 헤더 행을 포함한 시트 데이터
+
+    Returns:
+        List[str]: 문제 설명 목록 (문제가 없으면 빈 목록)
+    """
+    if not all_data:
+        return []
+
+    id_column = _column_map(all_data[0])['id']
+    seen = set()
+    duplicates = set()
+    empty_rows = 0
+
+    for row in all_data[1:]:
+        row_id = _cell(row, id_column)
+        if not row_id:
+            empty_rows += 1
+        elif row_id in seen:
+            duplicates.add(row_id)
+        seen.add(row_id)
+
+    problems = []
+    if empty_rows:
+        problems.append(f"id가 비어 있는 행 {empty_rows}개")
+    if duplicates:
+        problems.append(f"중복된 id {len(duplicates)}개 (예: {', '.join(sorted(duplicates)[:5])})")
+    return problems
+
+
+def extract_records(all_data: list) -> List[Dict]:
+    """
+    시트 데이터(헤더 포함)에서 스냅샷 레코드 추출
+
+    Args:
+        all_data (list): 헤더 행을 포함한 시트 데이터
+
+    Returns:
+        List[Dict]: 행 단위 레코드 목록
+    """
+    if not all_data:
+        return []
+
+    column_map = _column_map(all_data[0])
+
+    records = []
+    for index, row in enumerate(all_data[1:]):
+        address = _cell(row, column_map['address'])
+        records.append({
+            # 앱(src/lib/googleSheets.ts)과 동일한 기본 id 규칙
+            'id': _cell(row, column_map['id']) or f"hospital-{index + 1}",
+            'name': _cell(row, column_map['name']),
+            'lat': _parse_coordinate(_cell(row, column_map['lat'])),
+            'lng': _parse_coordinate(_cell(row, column_map['lng'])),
+            'status': _cell(row, column_map['status']),
+            'region': extract_region(address),
+        })
+
+    return records
+
+
+def encode_columns(records: List[Dict]) -> Dict:
+    """
+    레코드 목록을 컬럼 단위로 인코딩
+    세일즈 단계와 지역은 고유값 목록과 인덱스 배열로 저장합니다.
+
+    Args:
+        records (List[Dict]): 행 단위 레코드 목록
+
+    Returns:
+        Dict: 컬럼 단위 데이터
+    """
+    columns = {field: [] for field in SNAPSHOT_FIELDS}
+    dictionaries = {field: {} for field in DICTIONARY_FIELDS}
+
+    for record in records:
+        for field in SNAPSHOT_FIELDS:
+            value = record[field]
+            if field in dictionaries:
+                value = dictionaries[field].setdefault(value, len(dictionaries[field]))
+            columns[field].append(value)
+
+    for field in DICTIONARY_FIELDS:
+        columns[f"{field}_values"] = list(dictionaries[field])
+
+    return columns
+
+
+def decode_columns(columns: Dict) -> List[Dict]:
+    """
+    컬럼 단위 데이터를 레코드 목록으로 복원
+
+    Args:
+        columns (Dict): encode_columns()로 만든 데이터
+
+    Returns:
+        List[Dict]: 행 단위 레코드 목록
+    """
+    records = []
+    for i in range(len(columns['id'])):
+        record = {}
+        for field in SNAPSHOT_FIELDS:
+            value = columns[field][i]
+            if field in DICTIONARY_FIELDS:
+                value = columns[f"{field}_values"][value]
+            record[field] = value
+        records.append(record)
+    return records
+
+
+def build_delta(previous: List[Dict], current: List[Dict]) -> Dict:
+    """
+    이전 스냅샷 대비 변경분 계산
+
+    Args:
+        previous (List[Dict]): 이전 버전 레코드 목록
+        current (List[Dict]): 현재 버전 레코드 목록
+
+    Returns:
+        Dict: 추가/변경된 레코드(upserts)와 삭제된 id 목록(removed)
+        id는 고유하고 행 위치와 무관해야 합니다 (find_id_problems() 참고).
+    """
+    previous_by_id = {record['id']: record for record in previous}
+    current_ids = {record['id'] for record in current}
+
+    upserts = [record for record in current if previous_by_id.get(record['id']) != record]
+    removed = [record_id for record_id in previous_by_id if record_id not in current_ids]
+
+    return {
+        'upserts': encode_columns(upserts),
+        'removed': removed,
+    }
+
+
+def _write_gzip_json(path: str, payload: Dict):
+    """JSON을 gzip으로 압축하여 저장 (임시 파일에 쓴 뒤 교체)"""
+    data = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        # mtime=0으로 고정하여 같은 데이터는 같은 파일이 되도록 함
+        f.write(gzip.compress(data, mtime=0))
+    os.replace(temp_path, path)
+
+
+def _read_gzip_json(path: str) -> Optional[Dict]:
+    """gzip JSON 파일 읽기 (없거나 손상된 경우 None)"""
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+    except (OSError, ValueError) as e:
+        print(f"이전 스냅샷 읽기 실패: {str(e)}")
+        return None
+
+
+def publish_snapshot(all_data: list, output_dir: str = "public/data") -> Optional[Dict]:
+    """
+    스냅샷, 변경분, 매니페스트 파일을 생성합니다.
+    데이터가 이전 버전과 같으면 파일을 다시 쓰지 않습니다.
+    이전 또는 현재 버전의 id가 비어 있거나 중복되면 변경분을 만들지 않습니다.
+
+    Args:
+        all_data (list): 헤더 행을 포함한 시트 데이터
+        output_dir (str): 출력 디렉터리 (기본값은 Next.js public 폴더 아래이며,
+            빌드 시 앱과 함께 배포됨. 생성된 파일은 git에 커밋하지 않음)
+
+    Returns:
+        Optional[Dict]: 새 매니페스트 (변경이 없으면 None)
+    """
+    records = extract_records(all_data)
+    id_problems = find_id_problems(all_data)
+    columns = encode_columns(records)
+    content_hash = hashlib.sha256(
+        json.dumps(columns, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    ).hexdigest()
+
+    os.makedirs(output_dir, exist_ok=True)
+    snapshot_path = os.path.join(output_dir, SNAPSHOT_FILE)
+    delta_path = os.path.join(output_dir, DELTA_FILE)
+    manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+
+    previous = _read_gzip_json(snapshot_path)
+    if previous and previous.get('format') != SNAPSHOT_FORMAT:
+        previous = None
+
+    if previous and previous.get('hash') == content_hash:
+        print(f"지도 스냅샷 변경 없음 (버전 {previous['version']})")
+        return None
+
+    version = previous['version'] + 1 if previous else 1
+    generated_at = datetime.now().isoformat(timespec='seconds')
+
+    _write_gzip_json(snapshot_path, {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'generated_at': generated_at,
+        'hash': content_hash,
+        'count': len(records),
+        'stable_ids': not id_problems,
+        'columns': columns,
+    })
+
+    delta_base_version = None
+    if id_problems:
+        print(f"경고: id를 기준으로 변경분을 만들 수 없어 전체 스냅샷만 생성합니다 ({', '.join(id_problems)})")
+    elif previous and not previous.get('stable_ids'):
+        print("경고: 이전 스냅샷의 id가 고유하지 않아 이번 버전은 전체 스냅샷만 생성합니다.")
+
+    if previous and previous.get('stable_ids') and not id_problems:
+        delta = build_delta(decode_columns(previous['columns']), records)
+        delta_base_version = previous['version']
+        _write_gzip_json(delta_path, {
+            'format': SNAPSHOT_FORMAT,
+            'base_version': delta_base_version,
+            'version': version,
+            'hash': content_hash,
+            **delta,
+        })
+        print(f"지도 스냅샷 변경분: 추가/변경 {len(delta['upserts']['id'])}개, 삭제 {len(delta['removed'])}개")
+    elif os.path.exists(delta_path):
+        # 이전 변경분이 남아 있으면 새 버전과 맞지 않으므로 삭제
+        os.remove(delta_path)
+
+    manifest = {
+        'format': SNAPSHOT_FORMAT,
+        'version': version,
+        'generated_at': generated_at,
+        'hash': content_hash,
+        'count': len(records),
+        'snapshot': SNAPSHOT_FILE,
+        'delta': DELTA_FILE if delta_base_version else None,
+        'delta_base_version': delta_base_version,
+    }
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, manifest_path)
+
+    print(f"지도 스냅샷 생성 완료: 버전 {version}, {len(records)}개 병원")
+    return manifest
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+구글 시트 헤더 기반 컬럼 찾기
+src/lib/googleSheets.ts의 findColumnIndex와 같은 규칙으로 컬럼 인덱스를 찾습니다.
+"""
+
+from typing import List, Optional
+
+
+def find_column_index(headers: list, search_terms: List[str], exclude: Optional[List[str]] = None) -> int:
+    """
+    헤더에서 검색어를 포함하는 컬럼 인덱스 찾기 (대소문자 구분 없음)
+
+    Args:
+        headers (list): 헤더 행
+        search_terms (List[str]): 검색어 목록 (앞쪽일수록 우선)
+        exclude (Optional[List[str]]): 이 단어가 포함된 헤더는 제외
+
+    Returns:
+        int: 컬럼 인덱스 또는 -1
+    """
+    for term in search_terms:
+        for index, header in enumerate(headers):
+            header = str(header)
+            if exclude and any(word in header for word in exclude):
+                continue
+            if term.lower() in header.lower():
+                return index
+    return -1
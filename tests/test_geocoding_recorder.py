@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import geocoding_script
+from address_normalizer import AddressNormalizer
+from geocoding_recorder import (GeocodingRecorder, RecordingGeocoder, RecordingScheduler, RecordingSheetsUpdater,
+                                ReplayGeocoder, ReplayScheduler, ReplaySheetsUpdater, build_report,
+                                compact_sheet_values, expand_sheet_values, load_log, split_runs)
+from geocoding_scheduler import QuotaScheduler
+
+SHEET = [
+    ['순번', '진료과', '의원명', '주소', '위도', '경도', '1차 방문', '2차 방문', '메모'],
+    ['1', '내과', 'A의원', '서울시 강남구 테헤란로 1', '변환실패', '', '2024-01-10', '', '주차 불가'],
+    ['2', '내과', 'B의원', '부산시 해운대구 해운대로 2', '변환실패', '', '', ''],
+    ['3', '외과', 'C의원', '대구시 중구 동성로 3', '37.1', '127.1', '2024-05-01', ''],
+    ['4', '외과', 'D의원', '서울시 강남구 강남대로 4', '변환실패', '', '2024-02-01', '2024-06-01'],
+    ['5', '소아과', 'E의원', '인천시 남동구 예술로 5', '변환실패', '', '2024-03-01', ''],
+    # 주소가 없는 행은 우선순위가 높아도 호출 한도를 차지하지 않음
+    ['6', '내과', 'F의원', '', '변환실패', '', '2024-12-01', ''],
+]
+
+RESPONSES = {
+    '서울시 강남구 테헤란로 1': [(429, None, None), (200, None, (37.5, 127.0))],
+    '서울시 강남구 강남대로 4': [(200, None, (37.4, 127.02))],
+    '인천시 남동구 예술로 5': [(200, None, None)],
+    '부산시 해운대구 해운대로 2': [(200, None, (35.1, 129.1))],
+}
+
+
+class FakeGeocoder:
+    def __init__(self):
+        self.responses = {address: list(responses) for address, responses in RESPONSES.items()}
+        self.last_status_code = None
+        self.last_error = None
+
+    def geocode_address(self, address):
+        self.last_status_code, self.last_error, result = self.responses[address].pop(0)
+        return result
+
+
+class FakeSheetsUpdater:
+    def __init__(self):
+        self.updates = []
+
+    def get_sheet_data(self, spreadsheet_id, range_name):
+        return [list(row) for row in SHEET]
+
+    def update_sheet_data(self, spreadsheet_id, range_name, values, max_retries=3):
+        self.updates.append((range_name, values))
+
+
+class CapturingReplaySheetsUpdater(ReplaySheetsUpdater):
+    def __init__(self, log_file, run_id=None, script=None):
+        super().__init__(log_file, run_id, script)
+        self.updates = []
+
+    def update_sheet_data(self, spreadsheet_id, range_name, values, max_retries=3):
+        self.updates.append((range_name, values))
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(geocoding_script.time, 'sleep', lambda seconds: None)
+
+
+def record_run(log_file, quota_file, daily_limit, script='geocoding_script'):
+    recorder = GeocodingRecorder(log_file, script)
+    scheduler = QuotaScheduler(quota_file, daily_limit=daily_limit, per_minute_limit=100)
+    sheets_updater = FakeSheetsUpdater()
+    geocoding_script.process_failed_coordinates(
+        'sheet-id', '시트1',
+        RecordingGeocoder(FakeGeocoder(), recorder),
+        RecordingSheetsUpdater(sheets_updater, recorder),
+        scheduler=RecordingScheduler(scheduler, recorder),
+    )
+    return recorder.run_id, sheets_updater.updates
+
+
+def replay_run(log_file, run_id=None, script=None):
+    replay_updater = CapturingReplaySheetsUpdater(log_file, run_id, script)
+    geocoding_script.process_failed_coordinates(
+        'sheet-id', '시트1',
+        ReplayGeocoder(log_file, run_id, script),
+        replay_updater,
+        scheduler=ReplayScheduler(log_file, run_id, script),
+    )
+    return replay_updater.updates
+
+
+def test_record_then_replay_round_trip(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+
+    # 일일 한도 4회: 재시도 1회를 포함해 우선순위가 높은 3개 행만 처리하고 부산(날짜 없음)은 다음 실행으로
+    _, updates = record_run(log_file, str(tmp_path / 'quota.json'), daily_limit=4)
+
+    assert updates == [
+        ('시트1!E5:F5', [[37.4, 127.02]]),
+        ('시트1!E6:F6', [['변환실패', '']]),
+        ('시트1!E2:F2', [[37.5, 127.0]]),
+    ]
+
+    assert replay_run(log_file) == updates
+
+
+def test_replay_selects_one_run(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+    first_run, first_updates = record_run(log_file, str(tmp_path / 'quota1.json'), daily_limit=1)
+    second_run, second_updates = record_run(log_file, str(tmp_path / 'quota2.json'), daily_limit=100)
+    record_run(log_file, str(tmp_path / 'quota3.json'), daily_limit=2, script='address_normalizer')
+
+    assert len(first_updates) == 1 and len(second_updates) == 4
+
+    # 기본값은 해당 스크립트의 가장 최근 실행
+    assert replay_run(log_file, script='geocoding_script') == second_updates
+    assert replay_run(log_file, run_id=first_run) == first_updates
+    assert replay_run(log_file, run_id=second_run) == second_updates
+
+
+def test_recorder_keeps_recent_runs(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+    run_ids = [GeocodingRecorder(log_file, max_runs=3).run_id for _ in range(5)]
+
+    runs = split_runs(load_log(log_file))
+
+    assert [run[0]['run'] for run in runs] == run_ids[-3:]
+    assert all(run[0]['kind'] == 'run_start' for run in runs)
+
+
+def test_sheet_read_keeps_only_replay_columns(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+    record_run(log_file, str(tmp_path / 'quota.json'), daily_limit=100)
+
+    log_text = open(log_file, encoding='utf-8').read()
+    assert '주차 불가' not in log_text
+    assert 'A의원' not in log_text
+
+    compact = compact_sheet_values(SHEET)
+    assert compact['columns'] == [0, 3, 4, 5, 6, 7]
+    expanded = expand_sheet_values(compact)
+    assert expanded[0] == SHEET[0]
+    assert expanded[1] == ['1', '', '', '서울시 강남구 테헤란로 1', '변환실패', '', '2024-01-10', '', '']
+    assert [len(row) for row in expanded] == [len(row) for row in SHEET]
+
+
+def test_replay_geocoder_repeats_last_response(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+    geocoder = RecordingGeocoder(FakeGeocoder(), GeocodingRecorder(log_file))
+    geocoder.geocode_address('서울시 강남구 테헤란로 1')
+    geocoder.geocode_address('서울시 강남구 테헤란로 1')
+
+    replay = ReplayGeocoder(log_file)
+
+    assert replay.geocode_address('서울시 강남구 테헤란로 1') is None
+    assert replay.last_status_code == 429
+    assert replay.last_error is None
+    assert replay.geocode_address('서울시 강남구 테헤란로 1') == (37.5, 127.0)
+    assert replay.geocode_address('서울시 강남구 테헤란로 1') == (37.5, 127.0)
+    assert replay.geocode_address('기록 없는 주소') is None
+
+
+def test_build_report(tmp_path):
+    log_file = str(tmp_path / 'requests.log.jsonl')
+    recorder = GeocodingRecorder(log_file)
+    for entry in [
+        {'kind': 'geocode', 'address': 'A', 'level': 'original', 'rules': [], 'latency_ms': 100.0,
+         'status': 200, 'result': None},
+        {'kind': 'geocode', 'address': 'A', 'level': 'normalized', 'rules': ['r1'], 'latency_ms': 300.0,
+         'status': 200, 'result': [37.0, 127.0]},
+        {'kind': 'geocode', 'address': 'B', 'level': 'original', 'rules': [], 'latency_ms': 50.0,
+         'status': 200, 'result': [35.0, 129.0]},
+    ]:
+        recorder.record(entry)
+
+    report = build_report(load_log(log_file))
+
+    assert "카카오 API 호출: 3회" in report
+    assert "중복 호출 (캐시 시 절약 가능): 1회" in report
+    lines = report.splitlines()
+    address_lines = lines[lines.index("--- 비용이 큰 주소 상위 20개 (총 소요 시간 순) ---") + 1:]
+    assert address_lines[0].endswith('A') and address_lines[1].endswith('B')
+    assert any('규칙: r1' in line and '성공률 100.0%' in line for line in lines)
+
+
+def test_normalize_with_rules():
+    normalizer = AddressNormalizer()
+    address = '강원특별자치도 강릉시 경강로 2079, 2~5층(임당동, 유암빌딩)'
+
+    normalized, rules = normalizer.normalize_with_rules(address)
+
+    assert normalized == '강원특별자치도 강릉시 경강로 2079' == normalizer.normalize_address(address)
+    assert rules == [r'\([^)]*\)', r',\s*[^,]*$'] == normalizer.get_applied_rules(address)
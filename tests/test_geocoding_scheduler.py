@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import json
+from datetime import datetime
+
+import pytest
+
+import geocoding_scheduler
+from geocoding_scheduler import (KST, QuotaScheduler, geocode_with_quota, is_daily_quota_error,
+                                 prioritize_rows)
+
+
+class FakeClock:
+    def __init__(self, start):
+        self.now = start
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # 2024-03-20 10:00 KST
+    fake = FakeClock(datetime(2024, 3, 20, 10, 0, tzinfo=KST).timestamp())
+    monkeypatch.setattr(geocoding_scheduler.time, 'time', fake.time)
+    monkeypatch.setattr(geocoding_scheduler.time, 'sleep', fake.sleep)
+    return fake
+
+
+@pytest.fixture
+def state_file(tmp_path):
+    return str(tmp_path / 'quota.json')
+
+
+class FakeGeocoder:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.last_status_code = None
+        self.last_error = None
+
+    def geocode_address(self, address, **kwargs):
+        self.calls += 1
+        self.last_status_code, self.last_error, result = self.responses.pop(0)
+        return result
+
+
+def test_prioritize_rows_orders_by_latest_visit():
+    headers = ['id', '주소', '1차 방문', '1차 방문 내용', '2차 방문', '최종 업데이트']
+    rows = [
+        (2, ['a', 'x', '2024-01-01', '', '', '']),
+        (3, ['b', 'y', '', '', '', '']),
+        (4, ['c', 'z', '2024-01-01', '2024-12-31', '2024.03.05', '']),
+        (5, ['d', 'w', '', '', '', '2024-02-01']),
+    ]
+
+    assert [row_num for row_num, _ in prioritize_rows(headers, rows)] == [4, 5, 2, 3]
+
+
+def test_daily_cap(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=3, per_minute_limit=100)
+
+    assert [scheduler.acquire() for _ in range(4)] == [True, True, True, False]
+    assert scheduler.remaining_today() == 0
+
+
+def test_daily_reserve(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=5, per_minute_limit=100, daily_reserve=3)
+
+    assert scheduler.remaining_today() == 2
+
+
+def test_rollover_at_kst_midnight(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=1, per_minute_limit=100)
+    assert scheduler.acquire()
+    assert not scheduler.acquire()
+
+    # 2024-03-20 23:59 KST는 UTC로는 같은 날 14:59
+    clock.now = datetime(2024, 3, 20, 23, 59, tzinfo=KST).timestamp()
+    assert not scheduler.acquire()
+
+    clock.now = datetime(2024, 3, 21, 0, 0, 1, tzinfo=KST).timestamp()
+    assert scheduler.remaining_today() == 1
+    assert scheduler.acquire()
+
+
+def test_per_minute_wait(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=100, per_minute_limit=2)
+    start = clock.now
+
+    assert scheduler.acquire()
+    clock.now += 10
+    assert scheduler.acquire()
+    assert clock.sleeps == []
+
+    # 첫 호출 후 60초가 지날 때까지 대기
+    assert scheduler.acquire()
+    assert clock.now == pytest.approx(start + 60)
+
+
+def test_shared_state_between_instances(clock, state_file):
+    first = QuotaScheduler(state_file, daily_limit=3, per_minute_limit=100)
+    second = QuotaScheduler(state_file, daily_limit=3, per_minute_limit=100)
+
+    assert first.acquire()
+    assert second.acquire()
+    assert first.acquire()
+    assert not second.acquire()
+
+    with open(state_file, encoding='utf-8') as f:
+        assert json.load(f)['daily_count'] == 3
+
+
+def test_throttling_backs_off_and_retries(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=100, per_minute_limit=100)
+    # 본문을 알 수 없는 429는 일시적인 요청 제한으로 보고 재시도
+    throttled = (429, None, None)
+    geocoder = FakeGeocoder([throttled, throttled, (200, None, (37.5, 127.0))])
+
+    assert geocode_with_quota(geocoder, scheduler, '서울시 강남구') == ((37.5, 127.0), True)
+    assert clock.sleeps == [5, 10]
+    assert scheduler.remaining_today() == 97
+
+
+def test_throttling_retries_exhausted_marks_day(clock, state_file):
+    scheduler = QuotaScheduler(state_file, daily_limit=100, per_minute_limit=100)
+    throttled = (429, None, None)
+    geocoder = FakeGeocoder([throttled] * (geocoding_scheduler.THROTTLE_RETRIES + 1))
+
+    assert geocode_with_quota(geocoder, scheduler, '서울시 강남구') == (None, False)
+    assert scheduler.remaining_today() == 0
+
+
+@pytest.mark.parametrize('error', [
+    {'errorType': 'RequestThrottled', 'message': 'API limit has been exceeded.'},
+    {'code': -10, 'msg': 'API_LIMIT_EXCEED'},
+])
+def test_daily_quota_error_marks_day_exhausted(clock, state_file, error):
+    scheduler = QuotaScheduler(state_file, daily_limit=100, per_minute_limit=100)
+    geocoder = FakeGeocoder([(429, error, None)])
+
+    assert geocode_with_quota(geocoder, scheduler, '서울시 강남구') == (None, False)
+    assert scheduler.remaining_today() == 0
+    assert geocoder.calls == 1
+    assert clock.sleeps == []
+
+
+def test_is_daily_quota_error():
+    assert is_daily_quota_error({'errorType': 'RequestThrottled', 'message': 'API limit has been exceeded.'})
+    assert is_daily_quota_error({'code': -10, 'msg': 'API_LIMIT_EXCEED'})
+    assert not is_daily_quota_error({'errorType': 'InvalidArgument', 'message': 'query parameter required'})
+    assert not is_daily_quota_error(None)
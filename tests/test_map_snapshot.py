@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import os
+
+from map_snapshot import (DELTA_FILE, SNAPSHOT_FILE, build_delta, decode_columns, encode_columns,
+                          extract_records, find_id_problems, publish_snapshot)
+
+HEADERS = ['순번', '진료과', '의원명', '주소', '위도', '경도', '세일즈 단계']
+
+
+def make_sheet(*rows):
+    return [HEADERS] + [list(row) for row in rows]
+
+
+def read_gzip_json(path):
+    with gzip.open(path, 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def test_extract_records():
+    records = extract_records(make_sheet(
+        ['1', '내과', 'A의원', '서울시 강남구 테헤란로 123', '37.5', '127.0', '진행중'],
+        ['2', '내과', 'B의원', '부산시 해운대구 해운대로 264', '변환실패', '', ''],
+    ))
+
+    assert records == [
+        {'id': '1', 'name': 'A의원', 'lat': 37.5, 'lng': 127.0, 'status': '진행중', 'region': '서울시 강남구'},
+        {'id': '2', 'name': 'B의원', 'lat': None, 'lng': None, 'status': '', 'region': '부산시 해운대구'},
+    ]
+
+
+def test_status_falls_back_to_app_column():
+    # 헤더가 없으면 앱(columnMap.salesStage)과 같은 K열 사용
+    row = ['1', '', 'A의원', '서울시 강남구', '37.5', '127.0', '', '', '', '', '계약완료']
+    records = extract_records([['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h', 'i', 'j', 'k'], row])
+
+    assert records[0]['status'] == '계약완료'
+
+
+def test_encode_decode_round_trip():
+    records = [
+        {'id': '1', 'name': 'A', 'lat': 37.5, 'lng': 127.0, 'status': '진행중', 'region': '서울시 강남구'},
+        {'id': '2', 'name': 'B', 'lat': None, 'lng': None, 'status': '진행중', 'region': '부산시 해운대구'},
+        {'id': '3', 'name': 'C', 'lat': 35.1, 'lng': 129.1, 'status': '완료', 'region': '서울시 강남구'},
+    ]
+
+    columns = encode_columns(records)
+
+    assert columns['status'] == [0, 0, 1]
+    assert columns['status_values'] == ['진행중', '완료']
+    assert decode_columns(columns) == records
+
+
+def test_build_delta():
+    previous = [
+        {'id': '1', 'name': 'A', 'lat': 37.5, 'lng': 127.0, 'status': '진행중', 'region': '서울시 강남구'},
+        {'id': '2', 'name': 'B', 'lat': None, 'lng': None, 'status': '진행중', 'region': '부산시 해운대구'},
+        {'id': '3', 'name': 'C', 'lat': 35.1, 'lng': 129.1, 'status': '완료', 'region': '서울시 강남구'},
+    ]
+    current = [
+        previous[0],
+        dict(previous[1], lat=35.16, lng=129.16),
+        {'id': '4', 'name': 'D', 'lat': None, 'lng': None, 'status': '', 'region': ''},
+    ]
+
+    delta = build_delta(previous, current)
+
+    assert decode_columns(delta['upserts']) == current[1:]
+    assert delta['removed'] == ['3']
+
+
+def test_find_id_problems():
+    assert find_id_problems(make_sheet(['1'], ['2'])) == []
+    assert find_id_problems(make_sheet(['1'], [''])) == ["id가 비어 있는 행 1개"]
+    assert find_id_problems(make_sheet(['1'], ['1'])) == ["중복된 id 1개 (예: 1)"]
+
+
+def test_publish_snapshot_writes_delta(tmp_path):
+    output_dir = str(tmp_path)
+    sheet = make_sheet(
+        ['1', '', 'A', '서울시 강남구 x', '37.5', '127.0', '진행중'],
+        ['2', '', 'B', '부산시 해운대구 y', '변환실패', '', '진행중'],
+    )
+
+    first = publish_snapshot(sheet, output_dir)
+    assert first['version'] == 1 and first['delta'] is None
+    assert publish_snapshot(sheet, output_dir) is None
+
+    sheet.insert(1, ['3', '', 'C', '대구시 중구 z', '', '', ''])
+    second = publish_snapshot(sheet, output_dir)
+
+    assert second['version'] == 2
+    assert second['delta_base_version'] == 1
+    delta = read_gzip_json(os.path.join(output_dir, DELTA_FILE))
+    # 맨 위에 행을 추가해도 기존 행은 변경분에 포함되지 않음
+    assert delta['upserts']['id'] == ['3']
+    assert delta['removed'] == []
+
+
+def test_publish_snapshot_skips_delta_for_unstable_ids(tmp_path):
+    output_dir = str(tmp_path)
+    sheet = make_sheet(['1', '', 'A', '서울시 강남구 x', '', '', ''], ['1', '', 'B', '서울시 강남구 y', '', '', ''])
+    publish_snapshot(sheet, output_dir)
+
+    sheet.append(['2', '', 'C', '서울시 강남구 z', '', '', ''])
+    manifest = publish_snapshot(sheet, output_dir)
+
+    assert manifest['delta'] is None
+    assert not os.path.exists(os.path.join(output_dir, DELTA_FILE))
+    assert read_gzip_json(os.path.join(output_dir, SNAPSHOT_FILE))['stable_ids'] is False
+
+    # 중복이 해소되어도 이전 버전의 id를 믿을 수 없으므로 한 번은 전체 스냅샷만 생성
+    sheet[2][0] = '3'
+    assert publish_snapshot(sheet, output_dir)['delta'] is None
+    sheet[3][2] = 'C2'
+    assert publish_snapshot(sheet, output_dir)['delta'] == DELTA_FILE